@@ -1,15 +1,22 @@
 
-import time
-import threading
-
 import sublime
 import sublime_plugin
 
 # import .webfaction
 from .sublime_interactive.formatters import rectangle
-from .sublime_interactive.commands import SublimeInteractiveUpdateViewCommand
+from .sublime_interactive.commands import SublimeInteractiveUpdateViewCommand,\
+                                            SublimeInteractiveUpdateViewBatchCommand,\
+                                            SublimeInteractiveToggleTracingCommand,\
+                                            SublimeInteractiveExportTraceCommand,\
+                                            SublimeInteractiveMemoryReportCommand,\
+                                            SublimeInteractiveMemorySnapshotCommand,\
+                                            SublimeInteractiveRecordEventsCommand,\
+                                            SublimeInteractiveFocusNextCommand,\
+                                            SublimeInteractiveFocusPreviousCommand,\
+                                            SublimeInteractiveActivateFocusedCommand
 from .sublime_interactive.event_listeners import SublimeInteractiveEventListener
 from .sublime_interactive.iviews import BaseIView
+from .sublime_interactive.observables import ObservableProperty
 from .sublime_interactive.iregions import BaseIRegion, GenericIRegion, Button,\
                                             Space, LineBreak, HorizontalRule
 
@@ -40,13 +47,13 @@ class GetInputButton(Button):
                     self.iview.temp_example_container = [line_breaks, text]
                 else:
                     self.iview.temp_example_container[1].data = 'You entered "%s"' % user_input
-                    self.iview.temp_example_container[1].draw()
+                    self.iview.temp_example_container[1].update()
                 # End
                 return
             # No input, write error
             sublime.error_message('Please enter input')
         # Prompt the user for input
-        self.iview.view.window().show_input_panel(
+        self.iview.event_view.window().show_input_panel(
             'Input',
             '',
             self.get_input,
@@ -94,8 +101,9 @@ class StatusButton(Button):
 
 
 class ProgressBar(BaseIRegion):
+    percentage = ObservableProperty('percentage', 0)
+
     def __init__(self, width=50):
-        self.percentage = 0
         self.width = width
         super().__init__()
 
@@ -106,9 +114,7 @@ class ProgressBar(BaseIRegion):
 
 
 class ProgressPercentage(BaseIRegion):
-    def __init__(self):
-        self.percentage = 0
-        super().__init__()
+    percentage = ObservableProperty('percentage', 0)
 
     def get_data(self):
         return ('%d%%' % (self.percentage)).rjust(4)
@@ -135,28 +141,27 @@ class DownloadButton(Button):
         downloader.start()
 
 
-class Downloader(threading.Thread):
+class Downloader:
     def __init__(self, total, button, progress_bar_iregion, progress_percentage_iregion):
         self.total = total
         self.button = button
         self.progress_bar_iregion = progress_bar_iregion
         self.progress_percentage_iregion = progress_percentage_iregion
-        super().__init__()
+        self.done = 0
+        self.timer = None
 
-    def run(self):
+    def start(self):
         self.button.hide()
+        self.timer = self.progress_bar_iregion.call_every(20, self.step)
 
-        done = 0
-        while done <= self.total:
-            percentage = 100 * (done / self.total)
-            self.progress_bar_iregion.percentage = percentage
-            self.progress_percentage_iregion.percentage = percentage
-            self.progress_bar_iregion.draw()
-            self.progress_percentage_iregion.draw()
-            done += 1
-            time.sleep(.02)
-
-        self.button.show()
+    def step(self):
+        percentage = 100 * (self.done / self.total)
+        self.progress_bar_iregion.percentage = percentage
+        self.progress_percentage_iregion.percentage = percentage
+        self.done += 1
+        if self.done > self.total:
+            self.timer.cancel()
+            self.button.show()
 
 
 class TextWithBorder(GenericIRegion):
@@ -222,7 +227,7 @@ class ExampleIView(BaseIView):
                     scope='button.highlight',
                     flags=sublime.DRAW_OUTLINED
                 ),
-                post_process=lambda x: sublime.set_timeout_async(x.pop_region, 200),
+                post_process=lambda x: x.call_later(200, x.pop_region),
                 style_name='button',
                 styles={
                     'button': {
@@ -251,7 +256,7 @@ class ExampleIView(BaseIView):
                     scope='button.highlight',
                     flags=sublime.DRAW_OUTLINED
                 ),
-                post_process=lambda x: sublime.set_timeout_async(x.pop_region, 200),
+                post_process=lambda x: x.call_later(200, x.pop_region),
                 style_name='button',
                 styles={
                     'button': {
@@ -280,7 +285,7 @@ class ExampleIView(BaseIView):
                     scope='button.highlight',
                     flags=sublime.DRAW_OUTLINED,
                 ),
-                post_process=lambda x: sublime.set_timeout_async(x.pop_region, 200),
+                post_process=lambda x: x.call_later(200, x.pop_region),
                 style_name='button',
                 styles={
                     'button': {
@@ -1,7 +1,14 @@
 
+import os
+import time
+
 import sublime
 import sublime_plugin
 
+from .iviews import get_iview
+from .memory import MEMORY_TRACKER, measure_iview, find_leaks
+from .replay import EventRecorder
+
 
 class SublimeInteractiveUpdateViewCommand(sublime_plugin.TextCommand):
     def run(self, edit, data, start=0, end=None, read_only=True):
@@ -10,3 +17,111 @@ class SublimeInteractiveUpdateViewCommand(sublime_plugin.TextCommand):
             self.view.erase(edit, sublime.Region(start, end))
         self.view.insert(edit, start, data)
         self.view.set_read_only(read_only)
+
+
+class SublimeInteractiveUpdateViewBatchCommand(sublime_plugin.TextCommand):
+    def run(self, edit, changes, read_only=True):
+        self.view.set_read_only(False)
+        # Changes are ordered by start and applied back to front,
+        # so the offsets of the earlier ones stay valid
+        for start, end, data in reversed(changes):
+            if not start == end:
+                self.view.erase(edit, sublime.Region(start, end))
+            self.view.insert(edit, start, data)
+        self.view.set_read_only(read_only)
+
+
+class SublimeInteractiveToggleTracingCommand(sublime_plugin.TextCommand):
+    def run(self, edit, capacity=100000):
+        iview = get_iview(self.view)
+        if iview is None:
+            return
+        if iview.tracer.enabled:
+            iview.disable_tracing()
+            sublime.status_message('Tracing disabled for %s' % iview.label)
+        else:
+            iview.enable_tracing(capacity)
+            sublime.status_message('Tracing enabled for %s' % iview.label)
+
+
+class SublimeInteractiveExportTraceCommand(sublime_plugin.TextCommand):
+    def run(self, edit, file_name=None):
+        iview = get_iview(self.view)
+        if iview is None or not iview.tracer.enabled:
+            sublime.status_message('Tracing is not enabled for this view')
+            return
+        if file_name is None:
+            path = os.path.join(sublime.cache_path(), 'sublime_interactive')
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            file_name = os.path.join(path, 'trace-%d.json' % int(time.time()))
+        iview.tracer.export(file_name)
+        print('Exported trace of %s to %s' % (iview.label, file_name))
+
+
+class SublimeInteractiveMemoryReportCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        iview = get_iview(self.view)
+        if iview is not None:
+            print(measure_iview(iview).format())
+        leaks = find_leaks()
+        print('Unreleased IViews and IRegions: %s' % (leaks if leaks else 'none'))
+
+
+class SublimeInteractiveMemorySnapshotCommand(sublime_plugin.TextCommand):
+    # The first run takes a snapshot, every later run shows the growth since
+    def run(self, edit, limit=20):
+        labels = sorted(MEMORY_TRACKER.snapshots)
+        label = labels[-1] + 1 if labels else 0
+        MEMORY_TRACKER.take(label)
+        if not labels:
+            sublime.status_message('Took first memory snapshot')
+            return
+        print('Memory growth since snapshot %d:' % labels[-1])
+        for stat in MEMORY_TRACKER.diff(labels[-1], label, limit):
+            print('  %s' % stat)
+        # Only the latest snapshot is needed for the next comparison
+        for old_label in labels:
+            del MEMORY_TRACKER.snapshots[old_label]
+
+
+class SublimeInteractiveRecordEventsCommand(sublime_plugin.TextCommand):
+    # The first run starts recording clicks, the next one saves the recording
+    def run(self, edit, file_name=None):
+        iview = get_iview(self.view)
+        if iview is None:
+            return
+        if iview.recorder is None:
+            EventRecorder(iview).start()
+            sublime.status_message('Recording events of %s' % iview.label)
+            return
+        recorder = iview.recorder
+        recorder.stop()
+        if file_name is None:
+            path = os.path.join(sublime.cache_path(), 'sublime_interactive')
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            file_name = os.path.join(path, 'events-%d.jsonl.gz' % int(time.time()))
+        recorder.save(file_name)
+        print('Saved %d events of %s to %s' % (len(recorder.events), iview.label, file_name))
+
+
+class SublimeInteractiveFocusNextCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        iview = get_iview(self.view)
+        if iview is not None:
+            iview.focus_next(self.view)
+
+
+class SublimeInteractiveFocusPreviousCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        iview = get_iview(self.view)
+        if iview is not None:
+            iview.focus_next(self.view, backward=True)
+
+
+class SublimeInteractiveActivateFocusedCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        iview = get_iview(self.view)
+        if iview is not None:
+            iview.activate_focused(self.view)
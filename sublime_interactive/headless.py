@@ -0,0 +1,191 @@
+import sublime
+
+from .commands import SublimeInteractiveUpdateViewCommand, SublimeInteractiveUpdateViewBatchCommand
+
+
+# In-memory stand-ins for Sublime's View and Window. They keep the buffer,
+# regions and selection the way Sublime does, so IViews can be driven
+# without an editor, for instance to replay recorded sessions.
+
+class HeadlessSettings:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def has(self, name):
+        return name in self.values
+
+    def erase(self, name):
+        self.values.pop(name, None)
+
+
+class HeadlessSelection:
+    def __init__(self):
+        self.regions = []
+
+    def __len__(self):
+        return len(self.regions)
+
+    def __getitem__(self, index):
+        return self.regions[index]
+
+    def __iter__(self):
+        return iter(self.regions)
+
+    def clear(self):
+        self.regions = []
+
+    def add(self, region):
+        self.regions.append(region)
+
+
+class HeadlessView:
+    commands = {
+        'sublime_interactive_update_view': SublimeInteractiveUpdateViewCommand,
+        'sublime_interactive_update_view_batch': SublimeInteractiveUpdateViewBatchCommand
+    }
+    count = 0
+
+    def __init__(self, window=None):
+        HeadlessView.count += 1
+        self.view_id = HeadlessView.count
+        self.owner = window
+        self.text = ''
+        self.name = ''
+        self.read_only = False
+        self.regions = {}
+        self.view_settings = HeadlessSettings()
+        self.selection = HeadlessSelection()
+
+    def id(self):
+        return self.view_id
+
+    def window(self):
+        return self.owner
+
+    def settings(self):
+        return self.view_settings
+
+    def sel(self):
+        return self.selection
+
+    def set_name(self, name):
+        self.name = name
+
+    def set_read_only(self, read_only):
+        self.read_only = read_only
+
+    def set_scratch(self, scratch):
+        pass
+
+    def set_syntax_file(self, syntax_file):
+        pass
+
+    def show(self, *args):
+        pass
+
+    def size(self):
+        return len(self.text)
+
+    def substr(self, region):
+        return self.text[region.begin():region.end()]
+
+    def visible_region(self):
+        return sublime.Region(0, len(self.text))
+
+    def rowcol(self, point):
+        row = self.text.count('\n', 0, point)
+        return row, point - (self.text.rfind('\n', 0, point) + 1)
+
+    def text_point(self, row, col):
+        point = 0
+        for i in range(row):
+            point = self.text.find('\n', point) + 1
+            if not point:
+                return len(self.text)
+        return min(point + col, len(self.text))
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        self.regions[key] = [[x.begin(), x.end()] for x in regions]
+
+    def get_regions(self, key):
+        return [sublime.Region(begin, end) for begin, end in self.regions.get(key, [])]
+
+    def erase_regions(self, key):
+        self.regions.pop(key, None)
+
+    def run_command(self, name, args=None):
+        command = self.commands.get(name)
+        if command is not None:
+            command(self).run(None, **(args or {}))
+
+    def insert(self, edit, point, data):
+        self.text = self.text[:point] + data + self.text[point:]
+        size = len(data)
+        # Regions starting at the point move, regions around it grow
+        for regions in self.regions.values():
+            for region in regions:
+                if point <= region[0]:
+                    region[0] += size
+                    region[1] += size
+                elif point < region[1]:
+                    region[1] += size
+        return size
+
+    def erase(self, edit, region):
+        begin = region.begin()
+        end = region.end()
+        self.text = self.text[:begin] + self.text[end:]
+        size = end - begin
+        for regions in self.regions.values():
+            for region in regions:
+                for i in (0, 1):
+                    if region[i] > end:
+                        region[i] -= size
+                    elif region[i] > begin:
+                        region[i] = begin
+
+    def replace(self, edit, region, data):
+        self.erase(edit, region)
+        self.insert(edit, region.begin(), data)
+
+
+class HeadlessWindow:
+    count = 0
+
+    def __init__(self):
+        HeadlessWindow.count += 1
+        self.window_id = HeadlessWindow.count
+        self.views = []
+        self.panels = {}
+
+    def id(self):
+        return self.window_id
+
+    def new_file(self):
+        view = HeadlessView(self)
+        self.views.append(view)
+        return view
+
+    def active_view(self):
+        if self.views:
+            return self.views[-1]
+
+    def create_output_panel(self, name):
+        if not name in self.panels:
+            self.panels[name] = HeadlessView(self)
+        return self.panels[name]
+
+    def find_output_panel(self, name):
+        return self.panels.get(name)
+
+    def destroy_output_panel(self, name):
+        self.panels.pop(name, None)
+
+    def run_command(self, name, args=None):
+        pass
@@ -1,8 +1,50 @@
 
+import threading
+
 import sublime
 
 from ..errors import SublimeInteractiveError
 from ..formatters import rectangle
+from ..timers import TIMER_WHEEL
+from ..tracing import NULL_TRACER
+
+
+def split_chunks(data, chunk_size):
+    # Chunks end on a line break where possible so formatters see whole lines
+    start = 0
+    while start < len(data):
+        end = start + chunk_size
+        if end < len(data):
+            newline = data.rfind('\n', start, end)
+            if newline >= start:
+                end = newline + 1
+        yield data[start:end]
+        start = end
+
+
+def common_prefix(a, b, length):
+    # Binary search over slices, so the characters are compared in C
+    low = 0
+    high = length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a, b, length):
+    low = 0
+    high = length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
 
 
 class BaseIRegion:
@@ -20,9 +62,12 @@ class BaseIRegion:
         icon='',
         flags=sublime.DRAW_NO_OUTLINE | sublime.DRAW_NO_FILL,
         formatter=None,
-        formatter_kwargs=None
+        formatter_kwargs=None,
+        placeholder=None,
+        focusable=None
     ):
         self._iview = None
+        self.removed = False
         self.iview = iview
         self._igroup = None
         self.igroup = igroup
@@ -36,9 +81,17 @@ class BaseIRegion:
             self.process = process
         if post_process is not None:
             self.post_process = post_process
+        # Regions with a click handler of their own take keyboard focus
+        if focusable is None:
+            focusable = 'process' in self.__dict__ or type(self).process is not BaseIRegion.process
+        self.focusable = focusable
 
         self.formatter = formatter
         self.formatter_kwargs = {} if formatter_kwargs is None else formatter_kwargs
+        # Set by a container, the formatted data is padded to this width
+        self.pad_width = -1
+        # IRegions with a placeholder are formatted off the main thread
+        self.placeholder = placeholder
 
         if styles is None:
             styles = {}
@@ -52,6 +105,14 @@ class BaseIRegion:
         self.style_name = style_name
         self.style_history = []
 
+        self.bindings = []
+        self.observers = {}
+        self.generation = 0
+        self.container = None
+        self.stream_timer = None
+        self.streamed = None
+
+        self.rendered = None
         self.drawn = False
         self.disabled = False
         self.hidden = False
@@ -64,6 +125,23 @@ class BaseIRegion:
 
     @iview.setter
     def iview(self, value):
+        # Timers and bindings don't outlive the region's place in an IView,
+        # bindings are observed again when it is added back
+        if value is None:
+            TIMER_WHEEL.cancel_owner(self)
+            if self.iview is not None:
+                # Marks regions that were taken out of an IView for find_leaks
+                self.removed = True
+                if self.iview.focused is self:
+                    self.iview.focused = None
+                for observable, names in self.bindings:
+                    observable.unobserve(self.invalidate, *names)
+                self.detach_listeners()
+        elif self.iview is None:
+            self.removed = False
+            for observable, names in getattr(self, 'bindings', []):
+                observable.observe(self.invalidate, *names)
+            self.attach_listeners()
         self._iview = value
         if value and self.igroup and not self.igroup in self.iview.igroups:
             self.iview.igroups.append(self.igroup)
@@ -90,14 +168,38 @@ class BaseIRegion:
     def __str__(self):
         return self.get_formatted_data()
 
-    def get_formatted_data(self, formatter=None, formatter_kwargs=None):
-        data = self.get_data()
-        if formatter is None:
-            formatter = self.formatter
-        if not formatter is None:
-            if formatter_kwargs is None:
-                formatter_kwargs = self.formatter_kwargs
-            data = formatter(data, **formatter_kwargs)
+    @property
+    def rendered(self):
+        return self._rendered
+
+    @rendered.setter
+    def rendered(self, value):
+        # Layouts computed before the text changed are discarded
+        self._rendered = value
+        self.generation += 1
+
+    @property
+    def tracer(self):
+        if self.iview is None:
+            return NULL_TRACER
+        return self.iview.tracer
+
+    def get_formatted_data(self, formatter=None, formatter_kwargs=None, pad=True):
+        with self.tracer.span('format', 'formatter', key=self.key):
+            data = self.get_data()
+            streamed = self.streamed
+            if formatter is None and formatter_kwargs is None and streamed is not None and \
+                    streamed[:3] == (data, self.formatter, self.formatter_kwargs):
+                data = streamed[3]
+                formatter = None
+            elif formatter is None:
+                formatter = self.formatter
+            if not formatter is None:
+                if formatter_kwargs is None:
+                    formatter_kwargs = self.formatter_kwargs
+                data = formatter(data, **formatter_kwargs)
+            if pad and self.pad_width > 0:
+                data = rectangle(data, min_width=self.pad_width)
         return data
 
     def get_data(self):
@@ -123,17 +225,18 @@ class BaseIRegion:
         if regions:
             return regions[0]
 
-    def set_region(self, style_name=None, scope=None, icon=None, flags=None):
+    def set_region(self, style_name=None, scope=None, icon=None, flags=None, begin=None):
         if not self.drawn:
             return
 
         if self.key in self.iview.keys:
             self.del_region()
 
-        last_end_point = self.last_end_point()
-        end = last_end_point + len(self)
+        if begin is None:
+            begin = self.last_end_point()
+        end = begin + len(self.rendered)
 
-        region = sublime.Region(last_end_point, end)
+        region = sublime.Region(begin, end)
 
         style_name = self.style_name if style_name is None else style_name
         style = self.styles.get(style_name, {})
@@ -144,7 +247,7 @@ class BaseIRegion:
         flags = style.get('flags',
                         self.styles.get(self.style_name, {}).get('flags', sublime.DRAW_NO_OUTLINE | sublime.DRAW_NO_FILL)) if flags is None else flags
 
-        self.iview.view.add_regions(self.key, [region], scope, icon, flags)
+        self.iview.add_regions(self.key, [region], scope, icon, flags)
         self.style_history.append(
             {
                 'style_name': style_name,
@@ -154,18 +257,19 @@ class BaseIRegion:
             }
         )
 
-        if not self.key in self.iview.keys:
-            self.iview.keys.append(self.key)
+        self.iview.keys.add(self.key)
+        self.iview.update_focus(self)
 
         return region
 
     def del_region(self, forget=False):
         if not self.drawn:
             return
-        del self.iview.keys[self.iview.keys.index(self.key)]
+        self.iview.keys.discard(self.key)
+        self.iview.remove_focus(self)
         if forget:
             del self.style_history[-1]
-        self.iview.view.erase_regions(self.key)
+        self.iview.erase_regions(self.key)
 
     def pop_region(self, **kwargs):
         if not self.drawn:
@@ -187,15 +291,19 @@ class BaseIRegion:
 
     def enable(self):
         self.disabled = False
+        if self.iview is not None:
+            self.iview.update_focus(self)
 
     def disable(self):
         self.disabled = True
+        if self.iview is not None:
+            self.iview.update_focus(self)
 
     def undraw(self):
         if not self.drawn:
             return
         region = self.get_region()
-        self.iview.view.run_command(
+        self.iview.run_command(
             'sublime_interactive_update_view',
             {
                 'data': '',
@@ -205,11 +313,14 @@ class BaseIRegion:
         )
         self.del_region(forget=True)
         self.drawn = False
+        self.rendered = None
 
-    def draw(self):
+    def draw(self, data=None):
+        self.cancel_stream()
         if self.hidden:
             return
-        data = self.get_formatted_data()
+        if data is None:
+            data = self.get_formatted_data()
         last_style = self.style_history[-1] if self.style_history else {}
         if self.drawn:
             region = self.get_region()
@@ -218,7 +329,7 @@ class BaseIRegion:
             self.del_region(forget=True)
         else:
             begin = end = self.last_end_point()
-        self.iview.view.run_command(
+        self.iview.run_command(
             'sublime_interactive_update_view',
             {
                 'data': data,
@@ -227,15 +338,201 @@ class BaseIRegion:
             }
         )
         self.drawn = True
+        self.rendered = data
         # When you draw something that is already drawn, we reset it's style to the style when you clicked draw.
         # To force a restyleing, you must also do an undraw first.
         self.set_region(**last_style)
 
+    def update(self, data=None):
+        self.cancel_stream()
+        if self.hidden:
+            return
+        if not self.drawn:
+            if self.iview is not None and self.iview.drawn:
+                self.draw(data)
+            return
+        if data is None:
+            data = self.get_formatted_data()
+        rendered = self.rendered
+        if data == rendered:
+            # Results still being formatted for older data are stale
+            self.generation += 1
+            return
+
+        # Only the span between the common prefix and suffix gets replaced
+        length = min(len(data), len(rendered))
+        prefix = common_prefix(data, rendered, length)
+        suffix = common_suffix(data, rendered, length - prefix)
+
+        self.replace_span(prefix, len(rendered) - suffix, data[prefix:len(data) - suffix])
+
+    def replace_span(self, start, end, data):
+        # Replaces rendered[start:end], offsets are relative to the region
+        begin = self.get_region().begin()
+        rendered = self.rendered
+        self.iview.run_command(
+            'sublime_interactive_update_view',
+            {
+                'data': data,
+                'start': begin + start,
+                'end': begin + end
+            }
+        )
+        self.rendered = rendered[:start] + data + rendered[end:]
+        # Sublime stretches a region for edits made strictly inside of it,
+        # so it only has to be registered again when the edit touched an edge.
+        if start == 0 or end == len(rendered):
+            last_style = self.style_history[-1] if self.style_history else {}
+            self.del_region(forget=True)
+            self.set_region(begin=begin, **last_style)
+
+    def attach_listeners(self):
+        # Hooks for iregions that listen to something other than bound
+        # models, run when the iregion is added to and taken out of an IView
+        pass
+
+    def detach_listeners(self):
+        pass
+
+    def bind(self, observable, *names):
+        if self.iview is not None:
+            observable.observe(self.invalidate, *names)
+        self.bindings.append((observable, names))
+        return observable
+
+    def unbind(self, observable=None):
+        for binding in self.bindings[::]:
+            if observable is None or binding[0] is observable:
+                if self.iview is not None:
+                    binding[0].unobserve(self.invalidate, *binding[1])
+                self.bindings.remove(binding)
+
+    def invalidate(self, observable=None, name=None):
+        # Layouts computed for older data are discarded too
+        self.generation += 1
+        if self.iview is not None:
+            self.iview.invalidate(self)
+
+    def observe(self, callback, *names):
+        # Same as Observable.observe, for ObservableProperty attributes
+        for name in names or (None,):
+            self.observers.setdefault(name, []).append(callback)
+
+    def unobserve(self, callback, *names):
+        for name in names or (None,):
+            callbacks = self.observers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def notify(self, name):
+        callbacks = self.observers.get(name, []) + self.observers.get(None, [])
+        for callback in callbacks:
+            callback(self, name)
+        self.invalidate(self, name)
+
+    def call_later(self, delay, callback):
+        return TIMER_WHEEL.call_later(delay, callback, owner=self)
+
+    def call_every(self, interval, callback):
+        return TIMER_WHEEL.call_every(interval, callback, owner=self)
+
+    def stream(self, data, chunk_size=65536, progress=None, chunk_formatter=None, interval=0):
+        # Inserts data, a string or an iterable of strings, a chunk per timer
+        # tick so Sublime stays responsive. The region is registered with
+        # the first chunk. Only chunk_formatter is applied while streaming,
+        # the regular formatter needs the whole data. Afterwards the streamed
+        # text stands in for the formatted data until the data or the
+        # formatter change. Drawing or updating the IRegion cancels a stream.
+        self.cancel_stream()
+        self.streamed = None
+        if isinstance(data, str):
+            total = len(data)
+            chunks = split_chunks(data, chunk_size)
+        else:
+            total = None
+            chunks = iter(data)
+        raw_parts = []
+        parts = []
+        done = [0]
+        # The next chunk is read ahead so the last one finishes the stream
+        following = [next(chunks, None)]
+
+        def add(chunk):
+            done[0] += len(chunk)
+            raw_parts.append(chunk)
+            if chunk_formatter is not None:
+                chunk = chunk_formatter(chunk)
+            parts.append(chunk)
+            return chunk
+
+        def add_rest():
+            if following[0] is not None:
+                add(following[0])
+            for chunk in chunks:
+                add(chunk)
+
+        def finish():
+            self.stream_timer = None
+            self.data = ''.join(raw_parts)
+            self.streamed = (self.data, self.formatter, self.formatter_kwargs, ''.join(parts))
+            if progress is not None:
+                progress(self, done[0], total)
+
+        def step():
+            self.stream_timer = None
+            if self.hidden or not self.drawn:
+                # The rest is kept as data for when it is drawn again
+                add_rest()
+                finish()
+                return
+            chunk = following[0]
+            if chunk is None:
+                finish()
+                return
+            following[0] = next(chunks, None)
+            chunk = add(chunk)
+            if len(parts) == 1:
+                self.update(data=chunk)
+            else:
+                begin = self.get_region().begin()
+                end = begin + len(self.rendered)
+                self.iview.run_command(
+                    'sublime_interactive_update_view',
+                    {
+                        'data': chunk,
+                        'start': end,
+                        'end': end
+                    }
+                )
+                # Text added at a region's end isn't part of it, so it is
+                # registered again
+                self.rendered += chunk
+                last_style = self.style_history[-1] if self.style_history else {}
+                self.del_region(forget=True)
+                self.set_region(begin=begin, **last_style)
+            if following[0] is None:
+                finish()
+                return
+            if progress is not None:
+                progress(self, done[0], total)
+            self.stream_timer = self.call_later(interval, step)
+
+        if self.iview is None or not self.iview.drawn or self.hidden:
+            add_rest()
+            finish()
+        else:
+            step()
+
+    def cancel_stream(self):
+        if self.stream_timer is not None:
+            self.stream_timer.cancel()
+            self.stream_timer = None
+
     def process(self, iregion):
         region = self.get_region()
-        print('Clicked IRegion: %s - %d - %d:%d %d\n\'\'\'%s\'\'\'' % (
+        print('Clicked IRegion: %s - %s - %d:%d %d\n\'\'\'%s\'\'\'' % (
             self.key,
-            self.iview.view.sel()[0].begin(),
+            self.iview.event_point,
             region.begin(),
             region.end(),
             region.size(),
@@ -325,10 +622,10 @@ class BaseIGroup:
 
     def process(self, iregion):
         region = iregion.get_region()
-        print('Clicked IGroup: %s - %s - %d' % (
+        print('Clicked IGroup: %s - %s - %s' % (
             self.key,
             self.label,
-            iregion.iview.view.sel()[0].begin()
+            iregion.iview.event_point
             )
         )
 
@@ -344,6 +641,20 @@ class GenericIRegion(BaseIRegion):
         return str(self.data)
 
 
+class FieldIRegion(BaseIRegion):
+    def __init__(self, values, name, **kwargs):
+        self.values = values
+        self.name = name
+        super().__init__(**kwargs)
+        if hasattr(values, 'observe'):
+            self.bind(values, name)
+
+    def get_data(self):
+        if isinstance(self.values, dict):
+            return str(self.values.get(self.name, ''))
+        return str(getattr(self.values, self.name, ''))
+
+
 class Space(GenericIRegion):
     def __init__(self, width=1, **kwargs):
         super().__init__(data=' ' * width, **kwargs)
@@ -377,6 +688,7 @@ class Button(BaseIRegion):
         formatter_kwargs.update(kwargs.get('formatter_kwargs', {}))
         kwargs['formatter_kwargs'] = formatter_kwargs
 
+        kwargs['focusable'] = kwargs.get('focusable', True)
         kwargs['style_name'] = kwargs.get('style_name', 'button')
         kwargs['styles'] = kwargs.get('styles', {})
 
@@ -400,4 +712,397 @@ class Button(BaseIRegion):
         def call():
             self.pop_region()
             self.enable()
-        sublime.set_timeout_async(call, 200)
+        self.call_later(200, call)
+
+
+class PagedListIRegion(BaseIRegion):
+    def __init__(
+        self,
+        source,
+        row_formatter=str,
+        placeholder='...',
+        poll_interval=250,
+        **kwargs
+    ):
+        self.source = source
+        self.row_formatter = row_formatter
+        # Shown for rows that aren't loaded yet, and for the whole list
+        # until the row count is known
+        self.row_placeholder = placeholder
+        self.poll_interval = poll_interval
+        self.poll_timer = None
+        self.row_count = None
+        self.loaded_pages = set()
+        self.loaded_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def attach_listeners(self):
+        if not self.on_loaded in self.source.listeners:
+            self.source.listeners.append(self.on_loaded)
+
+    def detach_listeners(self):
+        if self.on_loaded in self.source.listeners:
+            self.source.listeners.remove(self.on_loaded)
+
+    def on_loaded(self, source, index):
+        # Called from the source's executor, index is None when the count
+        # was loaded. Pages are patched in by the next flush.
+        if self.iview is None:
+            return
+        if index is not None:
+            with self.loaded_lock:
+                self.loaded_pages.add(index)
+        self.invalidate()
+
+    def get_page_lines(self, index):
+        page_size = self.source.page_size
+        size = min(page_size, self.row_count - index * page_size)
+        rows = self.source.peek(index)
+        if rows is None:
+            return [self.row_placeholder] * size
+        return [self.row_formatter(row).replace('\n', ' ') for row in rows[:size]]
+
+    def get_data(self):
+        self.row_count = self.source.peek_count()
+        if self.row_count is None:
+            return '%s\n' % self.row_placeholder
+        lines = []
+        for index in range(self.source.page_count()):
+            lines.extend(self.get_page_lines(index))
+        return ''.join('%s\n' % line for line in lines)
+
+    def update(self, data=None):
+        with self.loaded_lock:
+            pages = self.loaded_pages
+            self.loaded_pages = set()
+        # Loaded pages only replace their own lines, the whole list is
+        # formatted again when the count changed
+        if data is None and self.drawn and not self.hidden and self.formatter is None and \
+                self.pad_width < 0 and self.row_count is not None and self.row_count == self.source.peek_count():
+            for index in sorted(pages):
+                if index * self.source.page_size < self.row_count:
+                    self.update_page(index)
+            return
+        row_count = self.row_count
+        super().update(data)
+        # Rows that became visible are requested without waiting for the poll
+        if self.drawn and self.row_count != row_count:
+            self.check_visible()
+
+    def update_page(self, index):
+        region = self.get_region()
+        view = self.iview.view
+        first_line = view.rowcol(region.begin())[0]
+        first_row = index * self.source.page_size
+        lines = self.get_page_lines(index)
+        # The first row can share its line with the previous region
+        if first_row == 0:
+            start = 0
+        else:
+            start = view.text_point(first_line + first_row, 0) - region.begin()
+        end = view.text_point(first_line + first_row + len(lines), 0) - region.begin()
+        end = min(end, len(self.rendered))
+        self.replace_span(start, end, ''.join('%s\n' % line for line in lines))
+
+    def get_row_index(self, point):
+        region = self.get_region()
+        if region is None or not region.begin() <= point < region.end():
+            return
+        view = self.iview.view
+        return view.rowcol(point)[0] - view.rowcol(region.begin())[0]
+
+    def get_row(self, point):
+        row_index = self.get_row_index(point)
+        if row_index is not None:
+            return self.source.get_row(row_index)
+
+    def get_visible_rows(self, view=None):
+        region = self.get_region()
+        if region is None or not self.row_count:
+            return
+        if view is None:
+            view = self.iview.view
+        visible = view.visible_region()
+        begin = max(region.begin(), visible.begin())
+        end = min(region.end(), visible.end())
+        if begin > end:
+            return
+        first_line = view.rowcol(region.begin())[0]
+        first = view.rowcol(begin)[0] - first_line
+        last = view.rowcol(end)[0] - first_line
+        return first, min(last, self.row_count - 1)
+
+    def check_visible(self):
+        if not self.drawn:
+            self.poll_timer.cancel()
+            self.poll_timer = None
+            return
+        # Also fetches the count again after the source was invalidated
+        self.source.peek_count()
+        for view in self.iview.views:
+            rows = self.get_visible_rows(view)
+            if rows is not None:
+                self.source.request(*rows)
+
+    def set_region(self, *args, **kwargs):
+        region = super().set_region(*args, **kwargs)
+        # Sublime has no scroll event, so the visible rows are polled.
+        # Every way of drawing registers the region, so polling starts here.
+        if self.drawn and (self.poll_timer is None or self.poll_timer.cancelled):
+            self.poll_timer = self.call_every(self.poll_interval, self.check_visible)
+            self.check_visible()
+        return region
+
+
+class TreeIRegion(BaseIRegion):
+    def __init__(
+        self,
+        data='',
+        load_children=None,
+        depth=0,
+        indent=2,
+        expanded_marker='- ',
+        collapsed_marker='+ ',
+        leaf_marker='  ',
+        **kwargs
+    ):
+        self.load_children = load_children
+        self.depth = depth
+        self.indent = indent
+        self.expanded_marker = expanded_marker
+        self.collapsed_marker = collapsed_marker
+        self.leaf_marker = leaf_marker
+        self.parent = None
+        # Children are only loaded on the first expand and kept until invalidated
+        self.children = None
+        self.expanded = False
+        super().__init__(data=data, **kwargs)
+
+    def is_leaf(self):
+        return self.load_children is None
+
+    def get_data(self):
+        if self.is_leaf():
+            marker = self.leaf_marker
+        elif self.expanded:
+            marker = self.expanded_marker
+        else:
+            marker = self.collapsed_marker
+        return '%s%s%s\n' % (' ' * (self.indent * self.depth), marker, self.data)
+
+    def get_children(self):
+        if self.children is None:
+            children = []
+            if not self.is_leaf():
+                for child in self.load_children(self):
+                    if not isinstance(child, TreeIRegion):
+                        child = TreeIRegion(
+                            data=child,
+                            indent=self.indent,
+                            leaf_marker=self.leaf_marker
+                        )
+                    child.depth = self.depth + 1
+                    child.parent = self
+                    children.append(child)
+            self.children = children
+        return self.children
+
+    def get_subtree(self):
+        # Descendants in the order they are shown while this node is expanded
+        iregions = []
+        for child in self.get_children():
+            iregions.append(child)
+            if child.expanded:
+                iregions.extend(child.get_subtree())
+        return iregions
+
+    def expand(self):
+        if self.expanded or self.is_leaf():
+            return
+        self.expanded = True
+        if self.iview is not None:
+            self.update()
+            index = self.iview.get_iregion_index(self) + 1
+            self.iview.add_iregions_index(index, self.get_subtree())
+
+    def collapse(self):
+        if not self.expanded:
+            return
+        if self.iview is not None:
+            index = self.iview.get_iregion_index(self) + 1
+            self.iview.del_iregions_range(index, index + len(self.get_subtree()))
+        self.expanded = False
+        self.update()
+
+    def toggle(self):
+        if self.expanded:
+            self.collapse()
+        else:
+            self.expand()
+
+    def invalidate_children(self):
+        expanded = self.expanded
+        self.collapse()
+        self.children = None
+        if expanded:
+            self.expand()
+
+    def process(self, iregion):
+        self.toggle()
+
+
+class BaseContainer:
+    # Lays out child iregions. Children are measured once and only the ones
+    # reported as changed are measured again, widths are then assigned in a
+    # single pass. Resizing sets the min_width of a child's formatter when
+    # it takes one, other children have their formatted data padded.
+    multiline = True
+
+    def __init__(self, children=None, spacing=0, equal_width=False, groups=None):
+        self.container = None
+        self.children = []
+        self.spacing = spacing
+        self.equal_width = equal_width
+        self.groups = [] if groups is None else groups
+        self.min_widths = {}
+        self.measured = {}
+        self.widths = {}
+        self.stretched = set()
+        self.separators = None
+        if children is None:
+            children = []
+        for child in children:
+            self.add_child(child)
+
+    def add_child(self, child):
+        if not isinstance(child, (BaseIRegion, BaseContainer)):
+            child = GenericIRegion(data=child)
+        if isinstance(child, BaseContainer) and child.multiline and not self.multiline:
+            raise SublimeInteractiveError(
+                '%s can\'t hold a %s' % (self.__class__.__name__, child.__class__.__name__)
+            )
+        child.container = self
+        if isinstance(child, BaseIRegion):
+            self.min_widths[child] = child.formatter_kwargs.get('min_width', -1)
+        self.children.append(child)
+        return child
+
+    def measure(self, child):
+        if isinstance(child, BaseContainer):
+            if not child.measured:
+                child.layout()
+            return child.get_width()
+        if child.formatter is not None and 'min_width' in child.formatter_kwargs:
+            formatter_kwargs = dict(child.formatter_kwargs)
+            formatter_kwargs['min_width'] = self.min_widths[child]
+            data = child.get_formatted_data(formatter_kwargs=formatter_kwargs, pad=False)
+        else:
+            data = child.get_formatted_data(pad=False)
+        lines = data.split('\n')
+        if len(lines) > 1 and not self.multiline:
+            raise SublimeInteractiveError(
+                '%s children must fit on one line: %r' % (self.__class__.__name__, data)
+            )
+        return max(len(line) for line in lines)
+
+    def resize(self, child, width):
+        # A child given back its measured width is formatted as configured
+        if width == self.measured[child]:
+            self.stretched.discard(child)
+        else:
+            self.stretched.add(child)
+        if child.formatter is not None and 'min_width' in child.formatter_kwargs:
+            # Formatter kwargs can be shared between iregions, so they're copied
+            formatter_kwargs = dict(child.formatter_kwargs)
+            if child in self.stretched:
+                formatter_kwargs['min_width'] = width
+            else:
+                formatter_kwargs['min_width'] = self.min_widths[child]
+            child.formatter_kwargs = formatter_kwargs
+        else:
+            child.pad_width = width if child in self.stretched else -1
+
+    def get_groups(self):
+        groups = list(self.groups)
+        if self.equal_width:
+            groups.append(self.children)
+        return groups
+
+    def get_width(self):
+        raise NotImplementedError
+
+    def layout(self, children=None):
+        # Returns the iregions that were resized and need drawing again
+        if children is None:
+            children = self.children
+        width = self.get_width() if self.measured else None
+        changed = False
+        for child in children:
+            measured = self.measure(child)
+            if self.measured.get(child) != measured:
+                self.measured[child] = measured
+                changed = True
+        if not changed:
+            return []
+
+        group_widths = {}
+        for group in self.get_groups():
+            group_width = max(self.measured[x] for x in group)
+            for child in group:
+                group_widths[child] = group_width
+
+        resized = []
+        for child in self.children:
+            child_width = group_widths.get(child, self.measured[child])
+            if isinstance(child, BaseIRegion) and self.widths.get(child) != child_width:
+                if child_width != self.measured[child] or child in self.stretched:
+                    self.resize(child, child_width)
+                    resized.append(child)
+            self.widths[child] = child_width
+
+        if self.container is not None and width is not None and width != self.get_width():
+            resized.extend(self.container.layout([self]))
+        return resized
+
+    def get_iregions(self):
+        raise NotImplementedError
+
+
+class HorizontalContainer(BaseContainer):
+    # Children are drawn one after another in the text, so they can't span
+    # lines or be laid out side by side as columns
+    multiline = False
+
+    def get_width(self):
+        widths = [self.widths.get(x, self.measured.get(x, 0)) for x in self.children]
+        return sum(widths) + self.spacing * max(len(widths) - 1, 0)
+
+    def get_iregions(self):
+        if self.separators is None:
+            self.separators = [Space(self.spacing) for x in self.children[1:]]
+        iregions = []
+        for i, child in enumerate(self.children):
+            if i and self.spacing:
+                iregions.append(self.separators[i - 1])
+            if isinstance(child, BaseContainer):
+                iregions.extend(child.get_iregions())
+            else:
+                iregions.append(child)
+        return iregions
+
+
+class VerticalContainer(BaseContainer):
+    def get_width(self):
+        return max([self.widths.get(x, self.measured.get(x, 0)) for x in self.children] or [0])
+
+    def get_iregions(self):
+        if self.separators is None:
+            self.separators = [LineBreak(1 + self.spacing) for x in self.children]
+        iregions = []
+        for child, separator in zip(self.children, self.separators):
+            if isinstance(child, BaseContainer):
+                iregions.extend(child.get_iregions())
+            else:
+                iregions.append(child)
+            iregions.append(separator)
+        return iregions
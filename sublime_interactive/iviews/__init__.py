@@ -1,16 +1,162 @@
 
 import time
 import os.path
+import threading
 
 import sublime
 
 from ..errors import SublimeInteractiveError
-from ..iregions import BaseIRegion, GenericIRegion
+from ..iregions import BaseIRegion, GenericIRegion, BaseContainer
+from ..timers import TIMER_WHEEL
+from ..render_cache import RENDER_CACHE, Snapshot
+from ..layout import LAYOUT_WORKER
+from ..tracing import NULL_TRACER, Tracer
 
 
 SUBLIME_INTERACTIVE_IVIEWS = []
 
 
+def get_iview(view):
+    settings = view.settings()
+    if settings.has('sublime_interactive_iview'):
+        sublime_interactive_iview_index = settings.get('sublime_interactive_iview')
+        if sublime_interactive_iview_index < len(SUBLIME_INTERACTIVE_IVIEWS):
+            return SUBLIME_INTERACTIVE_IVIEWS[sublime_interactive_iview_index]
+
+DEFAULT_SETTINGS = {
+    'rulers': [],
+    'highlight_line': False,
+    'fade_fold_buttons': True,
+    'caret_style': 'solid',
+    'line_numbers': False,
+    'draw_white_space': 'none',
+    'gutter': False,
+    'word_wrap': False,
+    'indent_guide_options': [],
+    'sublime_interactive_keyboard': True
+}
+
+FOCUS_KEY = 'sublime_interactive_focus'
+FOCUS_STYLE = {'scope': 'button.highlight', 'flags': sublime.DRAW_NO_FILL}
+
+_default_theme_path = None
+
+
+def get_default_theme_path():
+    # Only computed once per process
+    global _default_theme_path
+    if _default_theme_path is None:
+        default_theme_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            '..',
+            'sublime_interactive.tmTheme'
+        )
+        packages_path = sublime.packages_path()
+        _default_theme_path = default_theme_path[len(packages_path) - 8:]
+    return _default_theme_path
+
+
+def get_default_settings():
+    default_settings = dict(DEFAULT_SETTINGS)
+    default_settings['color_scheme'] = get_default_theme_path()
+    return default_settings
+
+
+class IViewPool:
+    # Keeps configured output panels ready, so that opening a panel IView
+    # only has to claim one instead of creating and configuring a view.
+    def __init__(self, size=2, settings=None):
+        self.size = size
+        self.settings = {} if settings is None else settings
+        self.views = {}
+        self.count = 0
+
+    def create(self, window):
+        self.count += 1
+        name = 'sublime_interactive_%d' % self.count
+        view = window.create_output_panel(name)
+        view.set_scratch(True)
+        view.set_read_only(True)
+        default_settings = self.get_settings()
+        default_settings['sublime_interactive_panel'] = name
+        default_settings['sublime_interactive_warm'] = True
+        view_settings = view.settings()
+        for setting, value in default_settings.items():
+            view_settings.set(setting, value)
+        return view
+
+    def get_settings(self):
+        default_settings = get_default_settings()
+        default_settings.update(self.settings)
+        return default_settings
+
+    def warm(self, window=None):
+        if window is None:
+            window = sublime.active_window()
+        views = self.views.setdefault(window.id(), [])
+        while len(views) < self.size:
+            views.append(self.create(window))
+
+    def claim(self, window=None):
+        if window is None:
+            window = sublime.active_window()
+        views = self.views.get(window.id())
+        view = views.pop() if views else self.create(window)
+        if view.size():
+            view.run_command(
+                'sublime_interactive_update_view',
+                {
+                    'data': '',
+                    'start': 0,
+                    'end': view.size()
+                }
+            )
+        # The pool is refilled after the claimed view has been painted
+        sublime.set_timeout(lambda: self.warm(window), 0)
+        return view
+
+    def release(self, view):
+        window = view.window()
+        if window is None:
+            return
+        name = view.settings().get('sublime_interactive_panel')
+        # The panel is hidden and emptied so it doesn't keep showing the
+        # previous IView
+        window.run_command('hide_panel', {'panel': 'output.%s' % name})
+        views = self.views.setdefault(window.id(), [])
+        if len(views) < self.size:
+            if view.size():
+                view.run_command(
+                    'sublime_interactive_update_view',
+                    {
+                        'data': '',
+                        'start': 0,
+                        'end': view.size()
+                    }
+                )
+            # Settings the IView applied go back to the pool's
+            view_settings = view.settings()
+            default_settings = self.get_settings()
+            for setting in view_settings.get('sublime_interactive_applied', []):
+                if setting in default_settings:
+                    view_settings.set(setting, default_settings[setting])
+                else:
+                    view_settings.erase(setting)
+            view_settings.erase('sublime_interactive_applied')
+            view_settings.erase('sublime_interactive_iview')
+            views.append(view)
+        else:
+            window.destroy_output_panel(name)
+
+    def show(self, view):
+        name = view.settings().get('sublime_interactive_panel')
+        if name is not None:
+            view.window().run_command('show_panel', {'panel': 'output.%s' % name})
+
+
+IVIEW_POOL = IViewPool()
+
+
 class BaseIView:
     def __init__(
         self,
@@ -20,45 +166,31 @@ class BaseIView:
         iregions=None,
         igroups=None,
         settings=None,
-        syntax_file=None
+        syntax_file=None,
+        pool=None
     ):
         if window is None:
             window = sublime.active_window()
+        self.pool = pool
         if view is None:
-            view = window.new_file()
+            if pool is None:
+                view = window.new_file()
+            else:
+                view = pool.claim(window)
         self.view = view
+        # Every attached view shows the same content, self.view is the one
+        # regions are read back from
+        self.views = [view]
 
         if syntax_file is not None:
             self.view.set_syntax_file(syntax_file)
+        self.syntax_file = syntax_file
 
-        default_theme_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            '..',
-            'sublime_interactive.tmTheme'
-        )
-        packages_path = sublime.packages_path()
-        default_theme_path = default_theme_path[len(packages_path) - 8:]
-
-        default_settings = {
-            'rulers': [],
-            'highlight_line': False,
-            'fade_fold_buttons': True,
-            'caret_style': 'solid',
-            'line_numbers': False,
-            'draw_white_space': 'none',
-            'gutter': False,
-            'word_wrap': False,
-            'indent_guide_options': [],
-            'color_scheme': default_theme_path
-        }
         if settings is None:
             settings = {}
-        default_settings.update(settings)
-        view_settings = self.view.settings()
-        for name, value in default_settings.items():
-            view_settings.set(name, value)
-
-        view_settings.set('sublime_interactive_iview', len(SUBLIME_INTERACTIVE_IVIEWS))
+        self.settings = settings
+        self.index = len(SUBLIME_INTERACTIVE_IVIEWS)
+        self.configure_view(self.view)
         SUBLIME_INTERACTIVE_IVIEWS.append(self)
 
         if label is None:
@@ -66,6 +198,12 @@ class BaseIView:
         self.label = label
         self.view.set_name(self.label)
 
+        self.tracer = NULL_TRACER
+
+        self.dirty = set()
+        self.dirty_lock = threading.Lock()
+        self.flush_pending = False
+
         self.iregions = []
         if iregions is None:
             iregions = []
@@ -77,11 +215,124 @@ class BaseIView:
         self.igroups = igroups
 
         self.last_event_time = 0
-        self.keys = []
+        # The view and point of the event being handled, for handlers
+        self.event_view = self.view
+        self.event_point = None
+        self.keys = set()
         self.drawn = False
         self.disabled = False
+        self.closed = False
+        self.recorder = None
+
+        # Enabled, visible and drawn iregions that take focus, in text order
+        self.focus_index = []
+        self.focus_members = set()
+        self.focused = None
+
+        if self.pool is not None:
+            self.pool.show(self.view)
+
+    def configure_view(self, view):
+        view_settings = view.settings()
+        # Warm views from a pool already have the default settings
+        if view_settings.get('sublime_interactive_warm'):
+            default_settings = self.settings
+            # Remembered so the pool can restore them on release
+            view_settings.set('sublime_interactive_applied', list(self.settings))
+        else:
+            default_settings = get_default_settings()
+            default_settings.update(self.settings)
+        for name, value in default_settings.items():
+            view_settings.set(name, value)
+        view_settings.set('sublime_interactive_iview', self.index)
+
+    def attach(self, view=None, window=None):
+        if view is None:
+            if window is None:
+                window = sublime.active_window()
+            view = window.new_file()
+        if view in self.views:
+            return view
+        if self.syntax_file is not None:
+            view.set_syntax_file(self.syntax_file)
+        self.configure_view(view)
+        view.set_name(self.label)
+        # The new view copies the content and regions instead of formatting again
+        view.run_command(
+            'sublime_interactive_update_view',
+            {
+                'data': self.view.substr(sublime.Region(0, self.view.size())),
+                'start': 0,
+                'end': view.size()
+            }
+        )
+        for iregion in self.iregions:
+            region = iregion.get_region()
+            if region is not None:
+                style = iregion.style_history[-1] if iregion.style_history else {}
+                view.add_regions(
+                    iregion.key,
+                    [region],
+                    style.get('scope', ''),
+                    style.get('icon', ''),
+                    style.get('flags', 0)
+                )
+        self.views.append(view)
+        return view
+
+    def detach(self, view):
+        if not view in self.views:
+            return
+        if len(self.views) == 1:
+            self.close()
+            return
+        # Only the bookkeeping of this view is dropped
+        for key in self.keys:
+            view.erase_regions(key)
+        view.settings().erase('sublime_interactive_iview')
+        view.settings().erase('sublime_interactive_keyboard')
+        view.erase_regions(FOCUS_KEY)
+        self.views.remove(view)
+        self.view = self.views[0]
+        if self.event_view is view:
+            self.event_view = self.view
+
+    def enable_tracing(self, capacity=100000):
+        if not self.tracer.enabled:
+            self.tracer = Tracer(capacity)
+        return self.tracer
+
+    def disable_tracing(self):
+        self.tracer = NULL_TRACER
+
+    def run_command(self, name, args=None):
+        if args is None:
+            args = {}
+        with self.tracer.span(
+            name,
+            'edit',
+            start=args.get('start'),
+            end=args.get('end'),
+            size=len(args.get('data', args.get('changes', ''))),
+            views=len(self.views)
+        ):
+            for view in self.views:
+                view.run_command(name, args)
+
+    def add_regions(self, key, regions, scope='', icon='', flags=0):
+        with self.tracer.span('add_regions', 'region', key=key):
+            for view in self.views:
+                view.add_regions(key, regions, scope, icon, flags)
+
+    def erase_regions(self, key):
+        with self.tracer.span('erase_regions', 'region', key=key):
+            for view in self.views:
+                view.erase_regions(key)
 
     def add_iregion(self, iregion):
+        if isinstance(iregion, BaseContainer):
+            self.add_iregions([iregion])
+            return iregion
         if not isinstance(iregion, BaseIRegion):
             iregion = GenericIRegion(data=iregion)
         if iregion.iview is not None:
@@ -95,10 +346,7 @@ class BaseIView:
         return iregion
 
     def add_iregions(self, iregions):
-        for i, iregion in enumerate(iregions):
-            iregion = self.add_iregion(iregion)
-            iregions[i] = iregion
-        return iregions
+        return self.add_iregions_index(len(self.iregions), iregions)
 
     def add_iregion_index(self, index, iregion):
         if isinstance(index, BaseIRegion):
@@ -116,13 +364,54 @@ class BaseIView:
     def add_iregions_index(self, index, iregions):
         if isinstance(index, BaseIRegion):
             index = self.iregions.index(index)
-        iregions.reverse()
+        # Containers are laid out and replaced by their iregions
+        if [x for x in iregions if isinstance(x, BaseContainer)]:
+            flattened = []
+            for iregion in iregions:
+                if isinstance(iregion, BaseContainer):
+                    iregion.layout()
+                    flattened.extend(iregion.get_iregions())
+                else:
+                    flattened.append(iregion)
+            iregions[:] = flattened
         for i, iregion in enumerate(iregions):
-            iregion = self.add_iregion_index(index, iregion)
+            if not isinstance(iregion, BaseIRegion):
+                iregion = GenericIRegion(data=iregion)
+            if iregion.iview is not None:
+                raise SublimeInteractiveError('IRegion already associated with an IView')
+            iregion.iview = self
             iregions[i] = iregion
-        iregions.reverse()
+        self.iregions[index:index] = iregions
+        if self.drawn:
+            self.draw_iregions(iregions)
         return iregions
 
+    def draw_iregions(self, iregions, datas=None):
+        # Draws consecutive undrawn iregions with a single edit,
+        # datas can supply already formatted text for each of them
+        if datas is None:
+            datas = [None] * len(iregions)
+        pairs = [(x, data) for x, data in zip(iregions, datas) if not x.hidden]
+        if not pairs:
+            return
+        iregions = [x for x, data in pairs]
+        datas = [x.get_formatted_data() if data is None else data for x, data in pairs]
+        begin = iregions[0].last_end_point()
+        self.run_command(
+            'sublime_interactive_update_view',
+            {
+                'data': ''.join(datas),
+                'start': begin,
+                'end': begin
+            }
+        )
+        for iregion, data in zip(iregions, datas):
+            last_style = iregion.style_history[-1] if iregion.style_history else {}
+            iregion.drawn = True
+            iregion.rendered = data
+            iregion.set_region(begin=begin, **last_style)
+            begin += len(data)
+
     def del_iregion(self, iregion):
         iregion.undraw()
         index = self.iregions.index(iregion)
@@ -138,6 +427,33 @@ class BaseIView:
             iregion = iregions.pop()
             self.del_iregion(iregion)
 
+    def del_iregions_range(self, start, stop):
+        # Removes consecutive iregions with a single edit
+        iregions = self.iregions[start:stop]
+        drawn = [x for x in iregions if x.drawn]
+        if drawn:
+            self.run_command(
+                'sublime_interactive_update_view',
+                {
+                    'data': '',
+                    'start': drawn[0].get_region().begin(),
+                    'end': drawn[-1].get_region().end()
+                }
+            )
+            for iregion in drawn:
+                iregion.del_region(forget=True)
+                iregion.drawn = False
+                iregion.rendered = None
+        del self.iregions[start:stop]
+        igroups = set(x.igroup for x in iregions if x.igroup)
+        for iregion in iregions:
+            iregion.iview = None
+        if igroups:
+            igroups -= set(x.igroup for x in self.iregions if x.igroup)
+            for igroup in igroups:
+                self.igroups.remove(igroup)
+        return iregions
+
     def del_iregion_index(self, index):
         iregion = self.iregions[index]
         iregion.undraw()
@@ -158,55 +474,349 @@ class BaseIView:
     def has_iregion(self, iregion):
         return iregion in self.iregions
 
+    def set_name(self, label=None):
+        if label is not None:
+            self.label = label
+        for view in self.views:
+            view.set_name(self.label)
+
     def draw(self):
         if self.drawn:
             self.undraw()
         self.drawn = True
-        self.view.set_name(self.label)
-        for iregion in self.iregions:
-            iregion.draw()
+        self.set_name()
+        with self.tracer.span('draw', 'iview', iregions=len(self.iregions)):
+            for iregion in self.iregions:
+                iregion.draw()
 
     def undraw(self):
         for iregion in self.iregions:
             iregion.undraw()
         self.drawn = False
 
+    def draw_async(self, iregions=None):
+        # Formats iregions off the main thread, by default the ones with a
+        # placeholder. Undrawn ones show their placeholder in the meantime.
+        if iregions is None:
+            iregions = [x for x in self.iregions if x.placeholder is not None]
+        if not self.drawn:
+            self.drawn = True
+            self.set_name()
+            pending = set(iregions)
+            self.draw_iregions(
+                self.iregions,
+                [x.placeholder or '' if x in pending else None for x in self.iregions]
+            )
+        else:
+            for iregion in iregions:
+                if not iregion.drawn:
+                    iregion.draw(iregion.placeholder or '')
+        LAYOUT_WORKER.format(self, iregions)
+
+    def apply_layout(self, results):
+        # Applies formatted text from the layout worker with a single edit.
+        # Results for iregions that changed since are dropped.
+        if self.closed:
+            return
+        changes = []
+        for iregion, generation, data in results:
+            if iregion.iview is not self or not iregion.drawn or iregion.hidden:
+                continue
+            if iregion.generation != generation or data == iregion.rendered:
+                continue
+            region = iregion.get_region()
+            changes.append((region.begin(), region.end(), data, iregion))
+        if not changes:
+            return
+        changes.sort(key=lambda x: (x[0], x[1]))
+        self.tracer.instant('apply_layout', 'iview', iregions=len(changes))
+        self.run_command(
+            'sublime_interactive_update_view_batch',
+            {'changes': [[begin, end, data] for begin, end, data, iregion in changes]}
+        )
+        # Replaced regions are registered again at their shifted offsets
+        shift = 0
+        for begin, end, data, iregion in changes:
+            last_style = iregion.style_history[-1] if iregion.style_history else {}
+            iregion.del_region(forget=True)
+            iregion.rendered = data
+            iregion.set_region(begin=begin + shift, **last_style)
+            shift += len(data) - (end - begin)
+
+    def snapshot(self):
+        regions = []
+        for iregion in self.iregions:
+            region = iregion.get_region()
+            if region is None:
+                regions.append(None)
+            else:
+                style = iregion.style_history[-1] if iregion.style_history else {}
+                regions.append([region.begin(), region.end(), style])
+        return Snapshot(self.view.substr(sublime.Region(0, self.view.size())), regions)
+
+    def paint(self, snapshot):
+        # Paints the buffer with one edit and registers the regions from
+        # the offset table, without formatting any iregion
+        if self.drawn:
+            self.undraw()
+        self.run_command(
+            'sublime_interactive_update_view',
+            {
+                'data': snapshot.buffer,
+                'start': 0,
+                'end': self.view.size()
+            }
+        )
+        self.drawn = True
+        self.set_name()
+        for iregion, entry in zip(self.iregions, snapshot.regions):
+            if entry is None:
+                continue
+            begin, end, style = entry
+            iregion.drawn = True
+            iregion.rendered = snapshot.buffer[begin:end]
+            iregion.set_region(begin=begin, **style)
+
+    def draw_cached(self, model, render_cache=None):
+        if render_cache is None:
+            render_cache = RENDER_CACHE
+        key = render_cache.make_key(self.label, model)
+        snapshot = render_cache.load(key)
+        if snapshot is None or len(snapshot.regions) != len(self.iregions) or \
+                [x.hidden for x in self.iregions] != [x is None for x in snapshot.regions]:
+            self.draw()
+            render_cache.save(key, self.snapshot())
+            return False
+        self.paint(snapshot)
+
+        # Afterwards the iregions are compared with the live data and only
+        # the text that changed is edited
+        def reconcile():
+            if not self.drawn:
+                return
+            for iregion in self.iregions:
+                iregion.update()
+            render_cache.save(key, self.snapshot())
+        sublime.set_timeout(reconcile, 0)
+        return True
+
+    def invalidate(self, iregion):
+        if not self.drawn:
+            return
+        # Changes made within the same tick are drawn by a single flush
+        with self.dirty_lock:
+            self.dirty.add(iregion)
+            if self.flush_pending:
+                return
+            self.flush_pending = True
+        sublime.set_timeout(self.flush, 0)
+
+    def flush(self):
+        with self.dirty_lock:
+            dirty = self.dirty
+            self.dirty = set()
+            self.flush_pending = False
+        if not dirty or self.closed:
+            return
+        # Only containers with a changed child are laid out again
+        containers = {}
+        for iregion in dirty:
+            if iregion.container is not None and iregion.iview is self:
+                containers.setdefault(iregion.container, []).append(iregion)
+        for container, children in containers.items():
+            dirty.update(container.layout(children))
+        iregions = []
+        with self.tracer.span('flush', 'iview', iregions=len(dirty)):
+            for iregion in dirty:
+                if iregion.iview is not self:
+                    continue
+                if iregion.placeholder is not None and iregion.drawn:
+                    iregions.append(iregion)
+                else:
+                    iregion.update()
+        LAYOUT_WORKER.format(self, iregions)
+
+    def call_later(self, delay, callback):
+        return TIMER_WHEEL.call_later(delay, callback, owner=self)
+
+    def call_every(self, interval, callback):
+        return TIMER_WHEEL.call_every(interval, callback, owner=self)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Late callbacks from timers and workers see an undrawn IView
+        self.drawn = False
+        TIMER_WHEEL.cancel_owner(self)
+        for iregion in self.iregions:
+            TIMER_WHEEL.cancel_owner(iregion)
+            iregion.unbind()
+            iregion.detach_listeners()
+        if SUBLIME_INTERACTIVE_IVIEWS[self.index] is self:
+            # Indexes are stored in view settings, so the slot is kept
+            SUBLIME_INTERACTIVE_IVIEWS[self.index] = None
+
+    def release(self):
+        # Hands a pooled view back without undrawing region by region
+        self.close()
+        for key in self.keys:
+            self.erase_regions(key)
+        self.keys = set()
+        self.erase_regions(FOCUS_KEY)
+        self.focus_index = []
+        self.focus_members = set()
+        self.focused = None
+        for iregion in self.iregions:
+            iregion.drawn = False
+            iregion.rendered = None
+        self.drawn = False
+        if self.pool is not None:
+            self.pool.release(self.view)
+
     def disable(self):
         self.disabled = True
 
     def enable(self):
         self.disabled = False
 
-    def process(self):
+    def process(self, view=None, event_time=None):
         if self.disabled:
             return
-        event_time = time.time()
-        regions = self.view.sel()
+        # Clicks from any attached view go to the same handlers
+        if view is None:
+            view = self.view
+        if event_time is None:
+            event_time = time.time()
+        regions = view.sel()
+        if self.recorder is not None:
+            self.recorder.record_click(event_time, regions)
         if not len(regions) == 1:
-            self.view.sel().clear()
+            view.sel().clear()
             return
         region = regions[0]
         if not region.empty():
-            self.view.sel().clear()
+            view.sel().clear()
             return
         point = region.begin()
         if event_time - self.last_event_time < 0.1:
-            self.view.sel().clear()
+            view.sel().clear()
             return
         self.last_event_time = event_time
+        self.event_view = view
+        self.event_point = point
+
+        with self.tracer.span('click', 'handler', point=point):
+            for key in self.keys:
+                regions = view.get_regions(key)
+                if regions:
+                    region = regions[0]
+                    if region.contains(point) and not point == region.end():
+                        iregion = [x for x in self.iregions if x.key == key][0]
+                        self.activate(iregion)
+                        return
+
+    def find_focus(self, point):
+        # Position of the first focusable iregion beginning at or after
+        # point. Regions keep their text order, so only O(log n) of them
+        # are looked up.
+        low = 0
+        high = len(self.focus_index)
+        while low < high:
+            middle = (low + high) // 2
+            if self.focus_index[middle].get_region().begin() < point:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_focus_position(self, iregion):
+        if not iregion in self.focus_members:
+            return
+        begin = iregion.get_region().begin()
+        # Empty regions can share their begin with the next one
+        for i in range(self.find_focus(begin), len(self.focus_index)):
+            if self.focus_index[i] is iregion:
+                return i
+            if self.focus_index[i].get_region().begin() > begin:
+                break
+        return self.focus_index.index(iregion)
+
+    def update_focus(self, iregion):
+        focusable = iregion.focusable and iregion.drawn and not iregion.hidden and \
+            not iregion.disabled and iregion.key in self.keys
+        if not focusable:
+            self.remove_focus(iregion)
+        elif not iregion in self.focus_members:
+            index = self.find_focus(iregion.get_region().begin())
+            self.focus_index.insert(index, iregion)
+            self.focus_members.add(iregion)
+        # The focus follows the focused iregion while it's disabled too
+        if iregion is self.focused and iregion.key in self.keys:
+            self.show_focus()
+
+    def remove_focus(self, iregion):
+        if not iregion in self.focus_members:
+            return
+        del self.focus_index[self.get_focus_position(iregion)]
+        self.focus_members.discard(iregion)
 
-        for key in self.keys:
-            regions = self.view.get_regions(key)
+    def show_focus(self):
+        # The focus is drawn as its own region, so restyling the focused
+        # iregion doesn't lose it
+        region = self.focused.get_region()
+        if region is not None:
+            self.add_regions(FOCUS_KEY, [region], FOCUS_STYLE['scope'], '', FOCUS_STYLE['flags'])
+
+    def focus(self, iregion, view=None):
+        if view is None:
+            view = self.view
+        self.focused = iregion
+        self.show_focus()
+        region = iregion.get_region()
+        if region is not None:
+            view.show(region)
+
+    def focus_next(self, view=None, backward=False):
+        if not self.focus_index:
+            return
+        if view is None:
+            view = self.view
+        position = None
+        if self.focused is not None:
+            position = self.get_focus_position(self.focused)
+        if position is not None:
+            index = position - 1 if backward else position + 1
+        else:
+            # A focused iregion that was disabled or removed keeps its place
+            # through the focus region, otherwise the caret is used
+            regions = view.get_regions(FOCUS_KEY)
             if regions:
-                region = regions[0]
-                if region.contains(point) and not point == region.end():
-                    iregion = [x for x in self.iregions if x.get_region() == region][0]
-                    if not iregion.disabled:
-                        handler = iregion.igroup if iregion.igroup else iregion
-                        if hasattr(handler, 'pre_process'):
-                            handler.pre_process(iregion)
-                        if hasattr(handler, 'process'):
-                            handler.process(iregion)
-                        if hasattr(handler, 'post_process'):
-                            handler.post_process(iregion)
-                    return
+                point = regions[0].begin()
+            elif len(view.sel()):
+                point = view.sel()[0].begin()
+            else:
+                point = 0
+            index = self.find_focus(point)
+            if backward:
+                index -= 1
+        iregion = self.focus_index[index % len(self.focus_index)]
+        self.focus(iregion, view)
+        return iregion
+
+    def activate_focused(self, view=None):
+        if self.disabled or not self.focused in self.focus_members:
+            return
+        self.event_view = self.view if view is None else view
+        self.event_point = self.focused.get_region().begin()
+        with self.tracer.span('key', 'handler', key=self.focused.key):
+            self.activate(self.focused)
+
+    def activate(self, iregion):
+        if iregion.disabled:
+            return
+        handler = iregion.igroup if iregion.igroup else iregion
+        for name in ('pre_process', 'process', 'post_process'):
+            if hasattr(handler, name):
+                with self.tracer.span(name, 'handler', key=iregion.key):
+                    getattr(handler, name)(iregion)
@@ -0,0 +1,39 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import sublime
+
+
+class LayoutWorker:
+    # Formats iregions on a thread pool and hands the results back to the
+    # IView on the main thread once every one of them is ready
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def format(self, iview, iregions):
+        if not iregions:
+            return
+        results = [None] * len(iregions)
+        remaining = [len(iregions)]
+        lock = threading.Lock()
+
+        def run(index, iregion, generation):
+            try:
+                results[index] = (iregion, generation, iregion.get_formatted_data())
+            except Exception:
+                traceback.print_exc()
+            with lock:
+                remaining[0] -= 1
+                done = not remaining[0]
+            if done:
+                sublime.set_timeout(
+                    lambda: iview.apply_layout([x for x in results if x is not None]),
+                    0
+                )
+
+        for index, iregion in enumerate(iregions):
+            self.executor.submit(run, index, iregion, iregion.generation)
+
+
+LAYOUT_WORKER = LayoutWorker()
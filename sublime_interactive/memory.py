@@ -0,0 +1,169 @@
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from .errors import SublimeInteractiveError
+from .iregions import BaseIRegion, TreeIRegion
+from .iviews import BaseIView, SUBLIME_INTERACTIVE_IVIEWS
+
+
+STYLE_ATTRIBUTES = ('styles', 'style_history', 'formatter_kwargs')
+TEXT_ATTRIBUTES = ('data', '_rendered')
+HANDLER_ATTRIBUTES = ('process', 'pre_process', 'post_process')
+
+
+def sizeof(obj, seen):
+    # Size of obj and the builtin containers it holds, counting every
+    # object once across the whole report
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+
+def sizeof_handler(handler, seen):
+    # Handlers are mostly lambdas, what they keep alive is in their closure
+    total = sizeof(handler, seen)
+    for cell in getattr(handler, '__closure__', None) or ():
+        try:
+            total += sizeof(cell.cell_contents, seen)
+        except ValueError:
+            pass
+    defaults = getattr(handler, '__defaults__', None)
+    if defaults:
+        total += sizeof(defaults, seen)
+    return total
+
+
+class MemoryReport:
+    def __init__(self, label):
+        self.label = label
+        self.sizes = {}
+        self.counts = {}
+
+    def add(self, category, size, count=0):
+        self.sizes[category] = self.sizes.get(category, 0) + size
+        self.counts[category] = self.counts.get(category, 0) + count
+
+    def total(self):
+        return sum(self.sizes.values())
+
+    def format(self):
+        lines = ['Memory of %s: %d bytes' % (self.label, self.total())]
+        for category, size in sorted(self.sizes.items(), key=lambda x: -x[1]):
+            lines.append('  %-40s %10d bytes %8d objects' % (category, size, self.counts[category]))
+        return '\n'.join(lines)
+
+
+def measure_iview(iview):
+    report = MemoryReport(iview.label)
+    # The IView's own objects are seen first, so iregions that point back
+    # at it aren't charged for it
+    seen = set([id(iview), id(iview.__dict__), id(iview.tracer), id(iview.iregions)])
+    seen.update(id(view) for view in iview.views)
+    report.add('iview', sys.getsizeof(iview) + sys.getsizeof(iview.__dict__), 1)
+    report.add('iview', sys.getsizeof(iview.iregions))
+    for name in ('keys', 'dirty', 'igroups'):
+        report.add('iview', sizeof(getattr(iview, name), seen))
+    if hasattr(iview.tracer, 'events'):
+        report.add('tracer', sizeof(iview.tracer.events, seen), len(iview.tracer.events))
+    report.add('registry', sys.getsizeof(SUBLIME_INTERACTIVE_IVIEWS), len(SUBLIME_INTERACTIVE_IVIEWS))
+
+    for iregion in iview.iregions:
+        attributes = iregion.__dict__
+        seen.add(id(iregion))
+        seen.add(id(attributes))
+        size = sys.getsizeof(iregion) + sys.getsizeof(attributes)
+        for name, value in attributes.items():
+            if name in STYLE_ATTRIBUTES:
+                report.add('styles', sizeof(value, seen), 1)
+            elif name in TEXT_ATTRIBUTES:
+                report.add('text', sizeof(value, seen), 1 if isinstance(value, str) else 0)
+            elif name in HANDLER_ATTRIBUTES:
+                report.add('handlers', sizeof_handler(value, seen), 1)
+            elif isinstance(value, (str, bytes, int, float, dict, list, tuple, set)):
+                size += sizeof(value, seen)
+        report.add('iregions.%s' % iregion.__class__.__name__, size, 1)
+    return report
+
+
+def is_cached(iregion):
+    # Collapsed tree nodes are kept by their parent for the next expand
+    if not isinstance(iregion, TreeIRegion):
+        return False
+    while iregion.parent is not None:
+        iregion = iregion.parent
+        if iregion.iview is not None:
+            return not iregion.iview.closed
+    return False
+
+
+def find_leaks():
+    # IViews and iregions still alive after they were closed or removed.
+    # Iregions that were never added, like template instances, don't count.
+    gc.collect()
+    leaks = {}
+    for obj in gc.get_objects():
+        if isinstance(obj, BaseIView):
+            if obj.closed:
+                name = 'closed %s' % obj.__class__.__name__
+                leaks[name] = leaks.get(name, 0) + 1
+        elif isinstance(obj, BaseIRegion):
+            if obj.iview is None:
+                if not obj.removed or is_cached(obj):
+                    continue
+                name = 'removed %s' % obj.__class__.__name__
+            elif obj.iview.closed:
+                name = '%s of closed IView' % obj.__class__.__name__
+            else:
+                continue
+            leaks[name] = leaks.get(name, 0) + 1
+    return leaks
+
+
+class MemoryTracker:
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.snapshots = {}
+
+    def start(self):
+        if tracemalloc is None:
+            raise SublimeInteractiveError('tracemalloc is not available in this Python')
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.snapshots = {}
+
+    def take(self, label):
+        self.start()
+        self.snapshots[label] = tracemalloc.take_snapshot()
+        return self.snapshots[label]
+
+    def diff(self, first, second, limit=20, pattern=None, key_type='lineno'):
+        old = self.snapshots[first]
+        new = self.snapshots[second]
+        if pattern is not None:
+            filters = [tracemalloc.Filter(True, pattern)]
+            old = old.filter_traces(filters)
+            new = new.filter_traces(filters)
+        return new.compare_to(old, key_type)[:limit]
+
+
+MEMORY_TRACKER = MemoryTracker()
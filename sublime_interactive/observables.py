@@ -0,0 +1,96 @@
+class Observable:
+    def __init__(self, **fields):
+        object.__setattr__(self, '_observers', {})
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        changed = not name in self.__dict__ or self.__dict__[name] != value
+        object.__setattr__(self, name, value)
+        if changed and not name.startswith('_'):
+            self.notify(name)
+
+    def observe(self, callback, *names):
+        # Observing without names means observing every field
+        for name in names or (None,):
+            self._observers.setdefault(name, []).append(callback)
+
+    def unobserve(self, callback, *names):
+        for name in names or (None,):
+            callbacks = self._observers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def notify(self, name):
+        callbacks = self._observers.get(name, []) + self._observers.get(None, [])
+        for callback in callbacks:
+            callback(self, name)
+
+
+class ObservableList(Observable):
+    def __init__(self, items=None):
+        super().__init__()
+        object.__setattr__(self, '_items', [] if items is None else list(items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        self._items[index] = value
+        self.notify('items')
+
+    def __delitem__(self, index):
+        del self._items[index]
+        self.notify('items')
+
+    def index(self, item):
+        return self._items.index(item)
+
+    def append(self, item):
+        self._items.append(item)
+        self.notify('items')
+
+    def extend(self, items):
+        self._items.extend(items)
+        self.notify('items')
+
+    def insert(self, index, item):
+        self._items.insert(index, item)
+        self.notify('items')
+
+    def remove(self, item):
+        self._items.remove(item)
+        self.notify('items')
+
+    def pop(self, index=-1):
+        item = self._items.pop(index)
+        self.notify('items')
+        return item
+
+
+# Attribute that calls notify(name) on its instance when its value changes.
+# IRegions use it so that setting the attribute redraws the region.
+class ObservableProperty:
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name, self.default)
+
+    def __set__(self, instance, value):
+        old_value = instance.__dict__.get(self.name, self.default)
+        instance.__dict__[self.name] = value
+        if old_value != value:
+            instance.notify(self.name)
@@ -0,0 +1,200 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BaseDataProvider:
+    def count(self):
+        raise NotImplementedError
+
+    def fetch_page(self, index, page_size):
+        raise NotImplementedError
+
+
+class FakeDataProvider(BaseDataProvider):
+    def __init__(self, rows, latency=0):
+        self.rows = list(rows)
+        self.latency = latency
+        self.fetches = 0
+        self.lock = threading.Lock()
+
+    def count(self):
+        time.sleep(self.latency)
+        return len(self.rows)
+
+    def fetch_page(self, index, page_size):
+        with self.lock:
+            self.fetches += 1
+        time.sleep(self.latency)
+        return self.rows[index * page_size:(index + 1) * page_size]
+
+
+class LRUCache:
+    def __init__(self, capacity=20):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key, default=None):
+        with self.lock:
+            if not key in self.items:
+                return default
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def peek(self, key, default=None):
+        return self.items.get(key, default)
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class PagedDataSource:
+    def __init__(
+        self,
+        provider,
+        page_size=100,
+        cache_size=20,
+        max_age=None,
+        prefetch=1,
+        executor=None
+    ):
+        self.provider = provider
+        self.page_size = page_size
+        # Pages are stored as (fetched_at, rows)
+        self.pages = LRUCache(cache_size)
+        self.max_age = max_age
+        self.prefetch = prefetch
+        self.executor = ThreadPoolExecutor(max_workers=2) if executor is None else executor
+        self.listeners = []
+        self.loading = set()
+        self.counting = False
+        self.lock = threading.Lock()
+        self._count = None
+        self.count_stale = False
+
+    def count(self):
+        if self._count is None:
+            self._count = self.provider.count()
+        return self._count
+
+    def peek_count(self):
+        # Doesn't block, an unknown or stale count is fetched on the executor
+        # and the listeners are called with index None once it is known. The
+        # last known count is served in the meantime.
+        if self._count is None or self.count_stale:
+            self.load_count()
+        return self._count
+
+    def page_count(self):
+        count = self.peek_count() or 0
+        return (count + self.page_size - 1) // self.page_size
+
+    def page_index(self, row):
+        return row // self.page_size
+
+    def peek(self, index):
+        page = self.pages.peek(index)
+        if page is not None:
+            return page[1]
+
+    def get(self, index):
+        page = self.pages.get(index)
+        if page is None:
+            self.load(index)
+            return
+        # Stale pages are still served while a fresh copy is fetched
+        fetched_at = page[0]
+        if fetched_at is None or \
+                self.max_age is not None and time.time() - fetched_at > self.max_age:
+            self.load(index)
+        return page[1]
+
+    def get_row(self, row):
+        rows = self.get(self.page_index(row))
+        if rows is not None:
+            return rows[row % self.page_size]
+
+    def request(self, first_row, last_row):
+        first = self.page_index(first_row)
+        last = self.page_index(last_row)
+        for index in range(first, last + 1):
+            self.get(index)
+        # Neighbouring pages are only fetched, they don't refresh the LRU order
+        for index in list(range(first - self.prefetch, first)) + \
+                list(range(last + 1, last + 1 + self.prefetch)):
+            if 0 <= index < self.page_count() and not index in self.pages:
+                self.load(index)
+
+    def load(self, index):
+        with self.lock:
+            if index in self.loading:
+                return
+            self.loading.add(index)
+        self.executor.submit(self._load, index)
+
+    def _load(self, index):
+        try:
+            rows = self.provider.fetch_page(index, self.page_size)
+            self.pages.set(index, (time.time(), rows))
+        except Exception as e:
+            print('Failed to fetch page %d: %s' % (index, e))
+            return
+        finally:
+            with self.lock:
+                self.loading.discard(index)
+        for listener in self.listeners[::]:
+            listener(self, index)
+
+    def load_count(self):
+        with self.lock:
+            if self.counting:
+                return
+            self.counting = True
+        self.executor.submit(self._load_count)
+
+    def _load_count(self):
+        try:
+            count = self.provider.count()
+            self._count = count
+            self.count_stale = False
+        except Exception as e:
+            print('Failed to count rows: %s' % e)
+            return
+        finally:
+            with self.lock:
+                self.counting = False
+        for listener in self.listeners[::]:
+            listener(self, None)
+
+    def invalidate(self, index=None):
+        # Invalidated pages are kept so they can be served stale until refetched
+        if index is None:
+            self.count_stale = True
+            indexes = list(self.pages.items.keys())
+        else:
+            indexes = [index]
+        with self.pages.lock:
+            for index in indexes:
+                page = self.pages.items.get(index)
+                if page is not None:
+                    self.pages.items[index] = (None, page[1])
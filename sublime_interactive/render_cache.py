@@ -0,0 +1,81 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+
+import sublime
+
+
+# File layout: magic, version, header length, JSON region table, UTF-8 buffer
+MAGIC = b'SIRC'
+VERSION = 1
+HEADER = struct.Struct('<4sII')
+
+
+class Snapshot:
+    def __init__(self, buffer, regions):
+        self.buffer = buffer
+        # One entry per iregion, None if it wasn't drawn, else [begin, end, style]
+        self.regions = regions
+
+
+class RenderCache:
+    def __init__(self, path=None):
+        self._path = path
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = os.path.join(sublime.cache_path(), 'sublime_interactive')
+        return self._path
+
+    def make_key(self, label, model):
+        data = json.dumps([label, model], sort_keys=True, default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def get_file_name(self, key):
+        return os.path.join(self.path, '%s.sirc' % key)
+
+    def load(self, key):
+        try:
+            with open(self.get_file_name(key), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    magic, version, length = HEADER.unpack_from(data, 0)
+                    if magic != MAGIC or version != VERSION:
+                        return
+                    start = HEADER.size
+                    regions = json.loads(data[start:start + length].decode('utf-8'))
+                    buffer = data[start + length:].decode('utf-8')
+        except (OSError, ValueError, struct.error):
+            return
+        return Snapshot(buffer, regions)
+
+    def save(self, key, snapshot):
+        header = json.dumps(snapshot.regions).encode('utf-8')
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        # Written next to the cache file and renamed over it, so readers
+        # never see a partially written snapshot
+        fd, temp_file_name = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, len(header)))
+                f.write(header)
+                f.write(snapshot.buffer.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file_name, self.get_file_name(key))
+        except Exception:
+            os.remove(temp_file_name)
+            raise
+
+    def discard(self, key):
+        try:
+            os.remove(self.get_file_name(key))
+        except OSError:
+            pass
+
+
+RENDER_CACHE = RenderCache()
@@ -0,0 +1,168 @@
+import gzip
+import json
+import time
+
+import sublime
+
+
+# Recordings are gzipped JSON lines, a header followed by one event per line:
+#   [seconds, 'click', [[a, b], ...]] for the selection that reached process()
+#   [seconds, 'set', label, name, value] for a change to a tracked Observable
+#     or to an ObservableProperty of a tracked IRegion
+VERSION = 1
+
+
+class EventRecorder:
+    def __init__(self, iview):
+        self.iview = iview
+        self.events = []
+        self.started = None
+        self.tracked = []
+
+    def start(self):
+        self.started = time.time()
+        self.iview.recorder = self
+
+    def stop(self):
+        if self.iview.recorder is self:
+            self.iview.recorder = None
+        for observable, callback, names in self.tracked:
+            observable.unobserve(callback, *names)
+        self.tracked = []
+
+    def get_time(self, event_time=None):
+        if event_time is None:
+            event_time = time.time()
+        return round(event_time - self.started, 6)
+
+    def record_click(self, event_time, regions):
+        self.events.append([
+            self.get_time(event_time),
+            'click',
+            [[x.a, x.b] for x in regions]
+        ])
+
+    def track(self, observable, label, *names):
+        def callback(observable, name):
+            value = getattr(observable, name, None)
+            try:
+                json.dumps(value)
+            except TypeError:
+                value = repr(value)
+            self.events.append([self.get_time(), 'set', label, name, value])
+        observable.observe(callback, *names)
+        self.tracked.append((observable, callback, names))
+
+    def save(self, file_name):
+        with gzip.open(file_name, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'version': VERSION, 'label': self.iview.label}) + '\n')
+            for event in self.events:
+                f.write(json.dumps(event, separators=(',', ':')) + '\n')
+        return file_name
+
+
+def load_events(file_name):
+    with gzip.open(file_name, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != VERSION:
+            raise ValueError('Unsupported recording version: %s' % header.get('version'))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayReport:
+    def __init__(self):
+        self.latencies = {}
+
+    def add(self, kind, seconds):
+        self.latencies.setdefault(kind, []).append(seconds * 1000)
+
+    def get_stats(self, kind):
+        latencies = sorted(self.latencies.get(kind, []))
+        if not latencies:
+            return {}
+
+        def percentile(percent):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))]
+        return {
+            'count': len(latencies),
+            'mean': sum(latencies) / len(latencies),
+            'min': latencies[0],
+            'p50': percentile(50),
+            'p90': percentile(90),
+            'p99': percentile(99),
+            'max': latencies[-1]
+        }
+
+    def format(self):
+        lines = []
+        for kind in sorted(self.latencies):
+            stats = self.get_stats(kind)
+            lines.append(
+                '%-6s count=%d mean=%.2fms min=%.2fms p50=%.2fms p90=%.2fms p99=%.2fms max=%.2fms' % (
+                    kind,
+                    stats['count'],
+                    stats['mean'],
+                    stats['min'],
+                    stats['p50'],
+                    stats['p90'],
+                    stats['p99'],
+                    stats['max']
+                )
+            )
+        return '\n'.join(lines)
+
+
+class EventReplayer:
+    # Feeds recorded events to an IView, usually one built on a HeadlessView.
+    # targets maps the labels used while recording to the Observables or
+    # IRegions the changes are applied to. The latency of an event includes the flush.
+    def __init__(self, events, iview, targets=None):
+        self.events = events
+        self.iview = iview
+        self.targets = {} if targets is None else targets
+        self.started = 0
+
+    def apply(self, event, report):
+        start = time.perf_counter()
+        if event[1] == 'click':
+            view = self.iview.view
+            view.sel().clear()
+            for a, b in event[2]:
+                view.sel().add(sublime.Region(a, b))
+            # The recorded time keeps the double click filter deterministic
+            self.iview.process(view, event_time=self.started + event[0])
+        elif event[1] == 'set':
+            target = self.targets.get(event[2])
+            if target is None:
+                return
+            setattr(target, event[3], event[4])
+        self.iview.flush()
+        report.add(event[1], time.perf_counter() - start)
+
+    def run(self, speed=None, on_done=None):
+        # Without a speed events are replayed back to back and the report is
+        # returned. Otherwise they are scheduled at their recorded times,
+        # divided by speed, so timers run in between, and on_done gets the
+        # report.
+        report = ReplayReport()
+        self.started = time.time()
+        if speed is None:
+            for event in self.events:
+                self.apply(event, report)
+            if on_done is not None:
+                on_done(report)
+            return report
+
+        events = list(self.events)
+        started = self.started
+        first = events[0][0] if events else 0
+
+        def step():
+            while events and (events[0][0] - first) / speed <= time.time() - started:
+                self.apply(events.pop(0), report)
+            if events:
+                delay = (events[0][0] - first) / speed - (time.time() - started)
+                sublime.set_timeout(step, max(0, int(delay * 1000)))
+            elif on_done is not None:
+                on_done(report)
+        step()
@@ -0,0 +1,163 @@
+import json
+
+import sublime
+
+from . import formatters
+from .errors import SublimeInteractiveError
+from .iregions import GenericIRegion, FieldIRegion, Button
+
+
+BUTTON_FORMATTER_KWARGS = {
+    'min_width': -1,
+    'center': True,
+    'left_padding': -1,
+    'right_padding': -1
+}
+
+
+def get_formatter(formatter):
+    # JSON specs name formatters from the formatters module
+    if formatter is None or callable(formatter):
+        return formatter
+    if not hasattr(formatters, formatter):
+        raise SublimeInteractiveError('Unknown formatter: %s' % formatter)
+    return getattr(formatters, formatter)
+
+
+def set_default_style(styles, style_name, scope='', flags=sublime.DRAW_NO_OUTLINE | sublime.DRAW_NO_FILL):
+    style = styles.setdefault(style_name, {})
+    style.setdefault('scope', scope)
+    style.setdefault('icon', '')
+    style.setdefault('flags', flags)
+    return styles
+
+
+def get_styles(spec, style_name, scope='', flags=sublime.DRAW_NO_OUTLINE | sublime.DRAW_NO_FILL):
+    styles = dict((name, dict(style)) for name, style in spec.get('styles', {}).items())
+    return set_default_style(styles, style_name, scope, flags)
+
+
+class LayoutTemplate:
+    # A layout spec compiled once into parts. Static text is formatted at
+    # compile time and every instance shares the styles and formatter
+    # kwargs, so instantiating only has to fill in the fields.
+    def __init__(self, spec):
+        if isinstance(spec, str):
+            spec = json.loads(spec)
+        self.parts = []
+        self.static_styles = get_styles({}, '__default__')
+        self.compile(spec)
+
+    def compile(self, spec):
+        if isinstance(spec, (list, tuple)):
+            for child in spec:
+                self.compile(child)
+            return
+
+        kind = spec.get('type', 'text')
+        if kind in ('row', 'group'):
+            self.compile(spec.get('children', []))
+            if kind == 'row':
+                self.add_static('\n')
+        elif kind == 'spacer':
+            self.add_static(' ' * spec.get('width', 1))
+        elif kind == 'break':
+            self.add_static('\n' * spec.get('amount', 1))
+        elif kind == 'rule':
+            self.add_static('-' * spec.get('width', 100))
+        elif kind == 'text':
+            data = str(spec.get('data', ''))
+            formatter = get_formatter(spec.get('formatter'))
+            if formatter is not None:
+                data = formatter(data, **spec.get('formatter_kwargs', {}))
+            if 'name' in spec or 'styles' in spec or 'style_name' in spec:
+                style_name = spec.get('style_name', '__default__')
+                self.parts.append(('text', data, {
+                    'name': spec.get('name'),
+                    'style_name': style_name,
+                    'styles': get_styles(spec, style_name)
+                }))
+            else:
+                self.add_static(data)
+        elif kind == 'button':
+            formatter = get_formatter(spec.get('formatter', formatters.rectangle))
+            formatter_kwargs = dict(BUTTON_FORMATTER_KWARGS)
+            formatter_kwargs.update(spec.get('formatter_kwargs', {}))
+            data = str(spec.get('data', ''))
+            if formatter is not None:
+                data = formatter(data, **formatter_kwargs)
+            style_name = spec.get('style_name', 'button')
+            highlight_style_name = spec.get('highlight_style_name', 'button.highlight')
+            styles = get_styles(spec, style_name, 'button', sublime.DRAW_NO_OUTLINE)
+            set_default_style(styles, highlight_style_name, 'button.highlight', sublime.DRAW_NO_OUTLINE)
+            self.parts.append(('button', data, {
+                'name': spec.get('name'),
+                'style_name': style_name,
+                'highlight_style_name': highlight_style_name,
+                'styles': styles
+            }))
+        elif kind == 'field':
+            if not 'name' in spec:
+                raise SublimeInteractiveError('Layout fields need a name')
+            style_name = spec.get('style_name', '__default__')
+            self.parts.append(('field', spec['name'], {
+                'formatter': get_formatter(spec.get('formatter')),
+                'formatter_kwargs': dict(spec.get('formatter_kwargs', {})),
+                'style_name': style_name,
+                'styles': get_styles(spec, style_name)
+            }))
+        else:
+            raise SublimeInteractiveError('Unknown layout type: %s' % kind)
+
+    def add_static(self, data):
+        # Neighbouring unstyled text is merged into a single part
+        if self.parts and self.parts[-1][0] == 'static':
+            data = self.parts.pop()[1] + data
+        self.parts.append(('static', data, None))
+
+    def instantiate(self, values=None, handlers=None):
+        if values is None:
+            values = {}
+        if handlers is None:
+            handlers = {}
+        iregions = []
+        for kind, data, options in self.parts:
+            if kind == 'static':
+                iregion = GenericIRegion(data=data, styles=self.static_styles)
+            elif kind == 'text':
+                iregion = GenericIRegion(
+                    data=data,
+                    process=handlers.get(options['name']),
+                    style_name=options['style_name'],
+                    styles=options['styles']
+                )
+            elif kind == 'button':
+                iregion = Button(
+                    data=data,
+                    process=handlers.get(options['name']),
+                    formatter=None,
+                    style_name=options['style_name'],
+                    highlight_style_name=options['highlight_style_name'],
+                    styles=options['styles']
+                )
+            else:
+                iregion = FieldIRegion(
+                    values,
+                    data,
+                    formatter=options['formatter'],
+                    formatter_kwargs=options['formatter_kwargs'],
+                    style_name=options['style_name'],
+                    styles=options['styles']
+                )
+            iregions.append(iregion)
+        return iregions
+
+    def instantiate_many(self, values_list, handlers=None):
+        iregions = []
+        for values in values_list:
+            iregions.extend(self.instantiate(values, handlers))
+        return iregions
+
+
+def compile_layout(spec):
+    return LayoutTemplate(spec)
@@ -0,0 +1,156 @@
+import time
+import threading
+import traceback
+
+import sublime
+
+from .tracing import NULL_TRACER
+
+
+class Timer:
+    def __init__(self, wheel, callback, interval=None, owner=None):
+        self.wheel = wheel
+        self.callback = callback
+        self.interval = interval
+        self.owner = owner
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.wheel.cancel(self)
+
+
+class TimerWheel:
+    # Every delayed call runs from a single Sublime timeout. It is only
+    # armed for the next slot that holds a timer, so a 250 ms poll wakes
+    # the wheel every 250 ms. Delays are in milliseconds like Sublime's.
+    def __init__(self, resolution=20, size=64):
+        self.resolution = resolution
+        self.slots = [[] for i in range(size)]
+        self.position = 0
+        self.owners = {}
+        self.count = 0
+        self.running = False
+        self.last_tick = 0
+        self.next_tick = 0
+        self.armed = 0
+        self.lock = threading.RLock()
+
+    def call_later(self, delay, callback, owner=None):
+        return self.add(Timer(self, callback, owner=owner), delay)
+
+    def call_every(self, interval, callback, owner=None):
+        return self.add(Timer(self, callback, interval=interval, owner=owner), interval)
+
+    def add(self, timer, delay):
+        with self.lock:
+            if not self.running:
+                self.last_tick = time.time()
+            # While the wheel sleeps its position lags behind the clock
+            lag = max(0, int((time.time() - self.last_tick) * 1000) // self.resolution)
+            ticks = self.schedule(timer, delay, lag)
+            self.owners.setdefault(timer.owner, []).append(timer)
+            self.count += 1
+            self.arm(ticks)
+        return timer
+
+    def schedule(self, timer, delay, lag=0):
+        ticks = max(1, -(-int(delay) // self.resolution)) + lag
+        timer.rounds = (ticks - 1) // len(self.slots)
+        self.slots[(self.position + ticks) % len(self.slots)].append(timer)
+        return ticks
+
+    def arm(self, ticks):
+        # Ticks are counted from the last tick. An armed timeout that is
+        # replaced by an earlier one is ignored when it fires.
+        due = self.last_tick + ticks * self.resolution / 1000
+        if self.running and due >= self.next_tick:
+            return
+        self.running = True
+        self.next_tick = due
+        self.armed += 1
+        armed = self.armed
+        delay = max(0, int((due - time.time()) * 1000))
+        sublime.set_timeout(lambda: self.tick(armed), delay)
+
+    def get_next_ticks(self):
+        # Ticks until the next slot with a live timer, timers due in a later
+        # round wake the wheel once per round
+        size = len(self.slots)
+        for ticks in range(1, size + 1):
+            for timer in self.slots[(self.position + ticks) % size]:
+                if not timer.cancelled:
+                    return ticks
+
+    def cancel(self, timer):
+        with self.lock:
+            if timer.cancelled:
+                return
+            # The timer is skipped when its slot comes around
+            timer.cancelled = True
+            self.count -= 1
+            timers = self.owners.get(timer.owner, [])
+            if timer in timers:
+                timers.remove(timer)
+            if not timers:
+                self.owners.pop(timer.owner, None)
+
+    def cancel_owner(self, owner):
+        with self.lock:
+            for timer in self.owners.get(owner, [])[::]:
+                self.cancel(timer)
+
+    def tick(self, armed=None):
+        due = []
+        with self.lock:
+            if armed is not None and armed != self.armed:
+                return
+            now = time.time()
+            elapsed = max(1, int((now - self.last_tick) * 1000) // self.resolution)
+            self.last_tick += elapsed * self.resolution / 1000
+            for i in range(elapsed):
+                self.position = (self.position + 1) % len(self.slots)
+                pending = []
+                for timer in self.slots[self.position]:
+                    if timer.cancelled:
+                        continue
+                    if timer.rounds:
+                        timer.rounds -= 1
+                        pending.append(timer)
+                    else:
+                        due.append(timer)
+                self.slots[self.position] = pending
+
+        iviews = []
+        for timer in due:
+            if timer.cancelled:
+                continue
+            if timer.interval is None:
+                self.cancel(timer)
+            else:
+                with self.lock:
+                    self.schedule(timer, timer.interval)
+            iview = getattr(timer.owner, 'iview', timer.owner)
+            tracer = getattr(iview, 'tracer', NULL_TRACER)
+            try:
+                with tracer.span('timer', 'timer', interval=timer.interval):
+                    timer.callback()
+            except Exception:
+                traceback.print_exc()
+            if hasattr(iview, 'flush') and not iview in iviews:
+                iviews.append(iview)
+        # Everything that was due this tick is drawn by one flush per IView
+        for iview in iviews:
+            iview.flush()
+
+        with self.lock:
+            if armed is not None and armed != self.armed:
+                # A timer added by a callback already armed the wheel
+                return
+            self.running = False
+            ticks = self.get_next_ticks() if self.count else None
+            if ticks is not None:
+                self.arm(ticks)
+
+
+TIMER_WHEEL = TimerWheel()
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record({
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': self.start,
+            'dur': self.tracer.now() - self.start,
+            'args': self.args
+        })
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    # Records spans into a bounded buffer, exported in the Chrome Trace
+    # Event format that chrome://tracing and Perfetto load
+    enabled = True
+
+    def __init__(self, capacity=100000):
+        self.events = deque(maxlen=capacity)
+        self.pid = os.getpid()
+        self.thread_names = {}
+
+    def now(self):
+        return time.perf_counter() * 1000000
+
+    def record(self, event):
+        tid = threading.get_ident()
+        if not tid in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        event['pid'] = self.pid
+        event['tid'] = tid
+        self.events.append(event)
+
+    def span(self, name, category='iview', **args):
+        return Span(self, name, category, args)
+
+    def instant(self, name, category='iview', **args):
+        self.record({
+            'name': name,
+            'cat': category,
+            'ph': 'i',
+            's': 't',
+            'ts': self.now(),
+            'args': args
+        })
+
+    def clear(self):
+        self.events.clear()
+
+    def to_json(self):
+        events = [
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'tid': tid,
+                'args': {'name': name}
+            }
+            for tid, name in list(self.thread_names.items())
+        ]
+        events.extend(list(self.events))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump(self.to_json(), f)
+        return file_name
+
+
+class NullTracer:
+    enabled = False
+
+    def span(self, name, category='iview', **args):
+        return NULL_SPAN
+
+    def instant(self, name, category='iview', **args):
+        pass
+
+
+NULL_TRACER = NullTracer()